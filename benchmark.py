@@ -0,0 +1,62 @@
+"""
+Course Manager Benchmark
+Times a bulk grading workload against the database file on disk and again in Working Set Mode.  The workload runs on a
+temporary copy of the database, so courseManager.db is never changed.
+Usage: python benchmark.py [number of students]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import main
+
+# Number of students added to the copy of the database for the workload
+STUDENTS = 500
+
+
+def runWorkload(students, working_set):
+    """
+    runWorkload: enrolls the students, grades every assignment for each of them, then recalculates every student's
+    total with FixGrades, the same statements the menu options generate
+    :param students: number of students to enroll
+    :param working_set: boolean, True to run in Working Set Mode
+    :return: float, seconds taken including the final write back to disk
+    """
+    main.workingSet = None
+    main.course = main.Course(main.COURSE_NAME)
+    start = time.perf_counter()
+    if working_set:
+        main.LoadWorkingSet()
+    main.preprocessing()
+    for i in range(students):
+        main.course.AddStudent("Bench Student{}".format(i), "@B{:07d}".format(i))
+    for student in main.course.students:
+        for assignment in main.course.assignments:
+            main.WriteGradedAssignment(student.student_number, assignment.name, assignment.point_value,
+                                       assignment.point_value)
+            student.total_points += assignment.point_value
+            main.UpdateStudent(student)
+    main.FixGrades()
+    main.SaveWorkingSet()
+    elapsed = time.perf_counter() - start
+    main.workingSet = None
+    return elapsed
+
+
+if __name__ == '__main__':
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else STUDENTS
+    main.VERBOSE = False
+    source = os.path.abspath(main.DATABASE_NAME)
+    results = {}
+    for mode, working_set in (("On Disk", False), ("Working Set", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            main.DATABASE_NAME = os.path.join(tmp, os.path.basename(source))
+            shutil.copyfile(source, main.DATABASE_NAME)
+            results[mode] = runWorkload(students, working_set)
+    print("{:12s}\t{}".format("Mode", "Seconds"))
+    for mode in results:
+        print("{:12s}\t{:.3f}".format(mode, results[mode]))
+    print("Working Set Mode is {:.1f}x faster".format(results["On Disk"] / results["Working Set"]))
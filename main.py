@@ -7,8 +7,15 @@ assignments, as well as imposing a late penalty on the students points for late
 easily managed and can be printed individually or as a while class.
 """
 
+import atexit
+import contextlib
 import datetime
+import html
+import multiprocessing
+import os
 import sqlite3
+import threading
+import time
 
 # - - - - - - - - - - - - - - - - - - - -  OPTIONS AND CONSTANTS  - - - - - - - - - - - - - - - - - - - - - - - #
 # ASCII Values to Color Text
@@ -29,6 +36,30 @@ COURSE_NAME = "CSCI3771"
 # Daily Penalty for late assignments 10% = .1
 PENALTY = .1
 
+# Directory report cards are written to, and the format they are written in ("txt" or "html")
+REPORT_CARD_DIR = "reportCards"
+REPORT_CARD_FORMAT = "txt"
+
+# Number of processes used to render report cards (None uses every core on the machine)
+REPORT_CARD_WORKERS = None
+
+# Directory database snapshots are written to, and how many snapshots to keep before the oldest are removed
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 10
+
+# Pages copied per step of an online backup, smaller values hold the database for shorter periods
+BACKUP_PAGES = 64
+
+# Seconds between automatic backups (None to turn off the background backup scheduler)
+BACKUP_INTERVAL = None
+
+# Working Set Mode loads the database into memory at startup and writes changes back to disk at checkpoints, when
+# saved from the menu and at exit.  Speeds up bulk operations (True to Turn on, False to turn off)
+WORKING_SET = False
+
+# Number of statements executed in Working Set Mode between checkpoints that write changes back to disk
+WORKING_SET_CHECKPOINT = 500
+
 
 # - - - - - - - - - - - - - - - - - - - -  CLASS DECLARATIONS  - - - - - - - - - - - - - - - - - - - - - - - #
 
@@ -115,12 +146,184 @@ class Assignment:
         return self.name == other.name
 
 
+class Ranking:
+    """
+    Ranking Class: keeps students ordered by score so rank and percentile questions do not need a sort of the class.
+    Every distinct score is given a position in order and a Fenwick tree counts the students at each position, so
+    updates and lookups are O(log n).  A score that has not been seen before rebuilds the tree, dropping scores that
+    no student has any more.
+    values: distinct scores in ascending order, position -> score
+    positions: position of each distinct score, score -> position
+    counts: Fenwick tree over the number of students at each position
+    members: students with each score, score -> set of student numbers
+    scores: current score for each student, student number -> score
+    size: number of students ranked
+
+    Update: adds a student or moves them to a new score
+    Remove: removes a student from the ranking
+    Rank: rank of a student, 1 is the highest score, tied scores share a rank
+    Percentile: percentage of the class scoring at or below a student
+    TopK: the k highest scoring students
+    Between: students whose percentile is between two percentiles
+    """
+
+    def __init__(self):
+        """
+        Initializes Instance of Ranking Class
+        """
+        self.values = []
+        self.positions = {}
+        self.counts = [0]
+        self.members = {}
+        self.scores = {}
+        self.size = 0
+
+    def _rebuild(self, score):
+        """
+        Gives a new score a position and rebuilds the Fenwick tree in O(number of distinct scores)
+        :param score: score that is not in the tree yet
+        """
+        self.values = sorted(set(self.members) | {score})
+        self.positions = {value: i for i, value in enumerate(self.values)}
+        self.counts = [0] * (len(self.values) + 1)
+        for i, value in enumerate(self.values):
+            self.counts[i + 1] = len(self.members.get(value, ()))
+        for i in range(1, len(self.counts)):
+            parent = i + (i & -i)
+            if parent < len(self.counts):
+                self.counts[parent] += self.counts[i]
+
+    def _add(self, position, delta):
+        """
+        Adds delta to the count at a position in the Fenwick tree
+        :param position: position of a score
+        :param delta: change in number of students
+        """
+        i = position + 1
+        while i < len(self.counts):
+            self.counts[i] += delta
+            i += i & -i
+
+    def _countUpTo(self, position):
+        """
+        Counts the students at positions up to and including position
+        :param position: position of a score
+        :return: int number of students
+        """
+        total = 0
+        i = position + 1
+        while i > 0:
+            total += self.counts[i]
+            i -= i & -i
+        return total
+
+    def _find(self, k):
+        """
+        Finds the position of the kth lowest score by walking down the Fenwick tree
+        :param k: position counting from the lowest score, starting at 1
+        :return: int position
+        """
+        pos = 0
+        step = 1 << (len(self.counts) - 1).bit_length()
+        while step:
+            if pos + step < len(self.counts) and self.counts[pos + step] < k:
+                pos += step
+                k -= self.counts[pos]
+            step //= 2
+        return pos
+
+    def Update(self, sn, score):
+        """
+        Update Method: adds a student to the ranking or moves them to their new score
+        :param sn: student number
+        :param score: student's new score
+        """
+        self.Remove(sn)
+        if score not in self.positions:
+            self._rebuild(score)
+        self.members.setdefault(score, set()).add(sn)
+        self.scores[sn] = score
+        self._add(self.positions[score], 1)
+        self.size += 1
+
+    def Remove(self, sn):
+        """
+        Remove Method: removes a student from the ranking, does nothing if they are not ranked
+        :param sn: student number
+        """
+        if sn not in self.scores:
+            return
+        score = self.scores.pop(sn)
+        self.members[score].discard(sn)
+        if not self.members[score]:
+            del self.members[score]
+        self._add(self.positions[score], -1)
+        self.size -= 1
+
+    def Rank(self, sn):
+        """
+        Rank Method: rank of a student in the class
+        :param sn: student number
+        :return: int rank, 1 is the highest score, None if the student is not ranked
+        """
+        if sn not in self.scores:
+            return None
+        return self.size - self._countUpTo(self.positions[self.scores[sn]]) + 1
+
+    def Percentile(self, sn):
+        """
+        Percentile Method: percentage of the class that scored at or below a student
+        :param sn: student number
+        :return: float percentile, None if the student is not ranked
+        """
+        if sn not in self.scores:
+            return None
+        return self._countUpTo(self.positions[self.scores[sn]]) * 100 / self.size
+
+    def TopK(self, k):
+        """
+        TopK Method: the k highest scoring students, highest first.  Students tied with the kth student are included
+        :param k: number of students
+        :return: list of student numbers
+        """
+        top = []
+        position = self.size
+        while position > 0 and len(top) < k:
+            students = self.members[self.values[self._find(position)]]
+            top.extend(sorted(students))
+            position -= len(students)
+        return top
+
+    def Between(self, low, high):
+        """
+        Between Method: students whose percentile is between low and high, lowest score first.  Starts at the first
+        score that can reach low with one walk down the Fenwick tree, then visits scores only until high is passed.
+        Percentiles are compared as whole numbers, count * 100 against percentile * size, so students exactly on a
+        bound are not lost to rounding
+        :param low: lowest percentile, 0 - 100
+        :param high: highest percentile, 0 - 100
+        :return: list of student numbers
+        """
+        between = []
+        position = max(1, int(-(-low * self.size // 100)))
+        while position <= self.size:
+            index = self._find(position)
+            count = self._countUpTo(index)
+            if count * 100 > high * self.size:
+                break
+            between.extend(sorted(self.members[self.values[index]]))
+            position = count + 1
+        return between
+
+
 class Course:
     """
     Course class: Course class holds data for the Course data structure
     name: course name
     assignments: list of assignments in course.  list contains Assignment Data Structures
     students: list of students in course.  list contains Student Data Structures
+    ranking: Ranking of students with at least one graded assignment by total points
+    assignmentRankings: Ranking of students by points earned on each assignment, assignment name -> Ranking
 
     AddStudent: Adds a student to the course
     AddAssignment: Adds an assignment to the course
@@ -134,6 +337,8 @@ class Course:
         self.name = name
         self.assignments = []
         self.students = []
+        self.ranking = Ranking()
+        self.assignmentRankings = {}
 
     def AddStudent(self, name, sn):
         """
@@ -183,6 +388,97 @@ class Course:
 
 # - - - - - - - - - - - - - - - - - - - -  DATABASE INTERACTIONS - - - - - - - - - - - - - - - - - - - - - - - #
 
+# In memory copy of the database used in Working Set Mode, None when running against the file on disk
+workingSet = None
+# Number of statements executed against the working set since it was last written back to disk
+unsavedStatements = 0
+# Held while the working set is written to or copied, so the backup scheduler thread never copies it mid statement.
+# Only used in Working Set Mode, on disk SQLite's own file locking keeps backups consistent
+workingSetLock = threading.RLock()
+
+
+def lockWorkingSet():
+    """
+    lockWorkingSet: returns workingSetLock in Working Set Mode and a context manager that does nothing otherwise, so
+    writes to the database file are never held up by the lock
+    :return: context manager
+    """
+    if workingSet is not None:
+        return workingSetLock
+    return contextlib.nullcontext()
+
+
+def getConnection():
+    """
+    getConnection: returns the connection every database function works through.  In Working Set Mode this is the
+    shared in memory database, otherwise a new connection to the database file
+    :return: sqlite3 connection
+    """
+    if workingSet is not None:
+        return workingSet
+    return sqlite3.connect(DATABASE_NAME)
+
+
+def closeConnection(db):
+    """
+    closeConnection: closes a connection returned by getConnection, unless it is the shared working set
+    :param db: sqlite3 connection
+    """
+    if db is not workingSet:
+        db.close()
+
+
+def LoadWorkingSet():
+    """
+    LoadWorkingSet: copies the database file into an in memory database and switches every database function over to
+    it.  Changes are written back to disk by SaveWorkingSet at checkpoints, from the menu and at exit
+    :return: int, number of pages loaded
+    """
+    global workingSet, unsavedStatements
+    start = time.perf_counter()
+    memory = sqlite3.connect(":memory:", check_same_thread=False)
+    disk = sqlite3.connect(DATABASE_NAME)
+    try:
+        loaded = copyDatabase(disk, memory, -1)
+    finally:
+        disk.close()
+    with workingSetLock:
+        workingSet = memory
+        unsavedStatements = 0
+    print(OK + "Loaded {} pages of {} into memory in {:.3f}s".format(
+        loaded, DATABASE_NAME, time.perf_counter() - start) + NORMAL)
+    return loaded
+
+
+def SaveWorkingSet():
+    """
+    SaveWorkingSet: writes the in memory database back to the database file.  The whole copy is made in one write
+    transaction on the file, so if the program dies part way through, SQLite rolls the file back from its journal to
+    the last completed save instead of leaving it half written
+    :return: boolean, True if changes were written, False if not in Working Set Mode or there was an error
+    """
+    global unsavedStatements
+    if workingSet is None:
+        return False
+    start = time.perf_counter()
+    with workingSetLock:
+        try:
+            disk = sqlite3.connect(DATABASE_NAME)
+            try:
+                saved = copyDatabase(workingSet, disk, -1)
+            finally:
+                disk.close()
+        except sqlite3.Error as err:
+            print(WARNING + "Save Failed: " + str(err) + NORMAL)
+            return False
+        unsavedStatements = 0
+    if VERBOSE: print(OK + "Saved {} pages to {} in {:.3f}s".format(
+        saved, DATABASE_NAME, time.perf_counter() - start) + NORMAL)
+    return True
+
+
+atexit.register(SaveWorkingSet)
+
 
 def WriteNewStudent(ns: Student) -> bool:
     """
@@ -224,7 +520,10 @@ def WriteGradedAssignment(sn, name, pv, pointsAwarded):
     sql = "INSERT INTO GradedAssignments (StudentNumber, AssignmentName, PointsPossible, PointsEarned, Course) " \
           "VALUES ('{}', '{}', '{}', '{}', '{}')".format(str(sn), str(name), str(pv),
                                                          str(pointsAwarded), COURSE_NAME)
-    return sqlExecute(sql)
+    success = sqlExecute(sql)
+    if success:
+        course.assignmentRankings.setdefault(name, Ranking()).Update(sn, pointsAwarded)
+    return success
 
 
 def WriteDeleteAssignment(assignment, update):
@@ -242,6 +541,7 @@ def WriteDeleteAssignment(assignment, update):
     sql = "DELETE FROM GradedAssignments WHERE AssignmentName = '{}'".format(assignment.name)
     if not update:
         deletedGradedAssignments = sqlExecute(sql)
+        course.assignmentRankings.pop(assignment.name, None)
     else:
         deletedGradedAssignments = True
     return deletedAssignments and deletedGradedAssignments
@@ -258,6 +558,9 @@ def WriteDeleteStudent(student):
     deletedStudents = sqlExecute(sql)
     sql = "DELETE FROM GradedAssignments WHERE StudentNumber = '{}'".format(student.student_number)
     deletedGradedAssignments = sqlExecute(sql)
+    course.ranking.Remove(student.student_number)
+    for ranking in course.assignmentRankings.values():
+        ranking.Remove(student.student_number)
     return deletedStudents and deletedGradedAssignments
     pass
 
@@ -267,7 +570,7 @@ def getStudents():
     getStudent: retrieves student records from the students table in the database
     :return: cursor object with student data
     """
-    db = sqlite3.connect(DATABASE_NAME)
+    db = getConnection()
     cursor = db.cursor()
     sql = "SELECT * FROM STUDENTS WHERE Course is '{}' ORDER BY LastName".format(COURSE_NAME)
     if VERBOSE: print(SQLCODE + "(VERBOSE): " + sql + NORMAL)
@@ -281,7 +584,7 @@ def getStudentGrades(student):
     :param student:
     :return: list of grades
     """
-    db = sqlite3.connect(DATABASE_NAME)
+    db = getConnection()
     cursor = db.cursor()
     sql = "SELECT * FROM GradedAssignments WHERE StudentNumber is '{}' " \
           "AND Course is '{}' ORDER BY AssignmentName".format(student.student_number, COURSE_NAME)
@@ -295,7 +598,7 @@ def getAssignments():
     getAssignments Function: retrieves assignments from database for the course
     :return: cursor object of assignment records
     """
-    db = sqlite3.connect(DATABASE_NAME)
+    db = getConnection()
     cursor = db.cursor()
     sql = "SELECT * FROM Assignments WHERE Course is '{}' ORDER BY DueDate".format(COURSE_NAME)
     if VERBOSE: print(SQLCODE + "(VERBOSE): " + sql + NORMAL)
@@ -314,7 +617,32 @@ def UpdateGradedAssignment(student_number, name, pointsAwarded):
     sql = "UPDATE GradedAssignments SET PointsEarned = '{}' WHERE StudentNumber = '{}' and " \
           "AssignmentName = '{}'".format(str(pointsAwarded), str(student_number), str(name),
                                          str(pointsAwarded), COURSE_NAME)
-    return sqlExecute(sql)
+    success = sqlExecute(sql)
+    if success:
+        course.assignmentRankings.setdefault(name, Ranking()).Update(student_number, pointsAwarded)
+    return success
+
+
+def getAllStudentGrades():
+    """
+    getAllStudentGrades: retrieves every student in the course together with their graded assignments in a single
+    query, so that report cards can be built without querying the database once per student
+    :return: list of tuples (student number, full name, total points, list of (assignment, possible, earned))
+    """
+    db = getConnection()
+    cursor = db.cursor()
+    sql = "SELECT s.ID, s.FirstName, s.LastName, s.TotalPoints, g.AssignmentName, g.PointsPossible, g.PointsEarned " \
+          "FROM Students s LEFT JOIN GradedAssignments g ON g.StudentNumber = s.ID AND g.Course is s.Course " \
+          "WHERE s.Course is '{}' ORDER BY s.LastName, s.ID, g.AssignmentName".format(COURSE_NAME)
+    if VERBOSE: print(SQLCODE + "(VERBOSE): " + sql + NORMAL)
+    students = []
+    for record in cursor.execute(sql):
+        if not students or students[-1][0] != record[0]:
+            students.append((record[0], record[1] + " " + record[2], record[3], []))
+        if record[4] is not None:
+            students[-1][3].append((record[4], record[5], record[6]))
+    closeConnection(db)
+    return students
 
 
 def sqlExecute(sql):
@@ -323,28 +651,41 @@ def sqlExecute(sql):
     :param sql: valid SQL statement for current database
     :return: boolean, True if SQL statement was committed, False if error occurred
     """
-    db = sqlite3.connect(DATABASE_NAME)
+    global unsavedStatements
+    db = getConnection()
     cursor = db.cursor()
     if VERBOSE: print(SQLCODE + "(VERBOSE): " + sql + NORMAL)
-    try:
-        cursor.execute(sql)
-        db.commit()
-        return True
-    except sqlite3.OperationalError as err:
-        print(WARNING + str(err) + NORMAL)
-        print(WARNING + "Check Your Formatting, do not use special characters in your input")
-        return False
+    with lockWorkingSet():
+        try:
+            cursor.execute(sql)
+            db.commit()
+            if workingSet is not None:
+                unsavedStatements += 1
+                if unsavedStatements >= WORKING_SET_CHECKPOINT:
+                    SaveWorkingSet()
+            return True
+        except sqlite3.OperationalError as err:
+            print(WARNING + str(err) + NORMAL)
+            print(WARNING + "Check Your Formatting, do not use special characters in your input")
+            return False
 
 
 def UpdateStudent(student):
     """
-    UpdateStudent: generates SQL statement to update a student's total points after an assignment is graded
+    UpdateStudent: generates SQL statement to update a student's total points after an assignment is graded.  The
+    student is ranked by their new total as long as they have a graded assignment, otherwise they are unranked
     :param student: valid Student Data Type of student who's assignment was graded
     :return:  result of sqlExecute Function
     """
     sql = "UPDATE Students SET TotalPoints = '{}' WHERE ID is '{}'".format(str(student.total_points),
                                                                            str(student.student_number))
-    return sqlExecute(sql)
+    success = sqlExecute(sql)
+    if success:
+        if any(student.student_number in ranking.scores for ranking in course.assignmentRankings.values()):
+            course.ranking.Update(student.student_number, student.total_points)
+        else:
+            course.ranking.Remove(student.student_number)
+    return success
 
 
 def CheckIfExists(student, assignment):
@@ -355,7 +696,7 @@ def CheckIfExists(student, assignment):
     :param assignment: assignment class object
     :return: tuple (Boolean, Record in Tuple form) Boolean is False and record is None if it doesn't exist
     """
-    db = sqlite3.connect(DATABASE_NAME)
+    db = getConnection()
     cursor = db.cursor()
     sql = "SELECT * FROM GradedAssignments WHERE StudentNumber is '{}' and AssignmentName is '{}'".format(
         student.student_number, assignment.name)
@@ -372,7 +713,7 @@ def FixGrades():
     graded Assignments table, then adds up their total points, then updates their student record with the correct amount
     :return: Nothing
     """
-    conn = sqlite3.connect(DATABASE_NAME)
+    conn = getConnection()
     cursor = conn.cursor()
     for student in course.students:
         student.total_points = 0
@@ -384,6 +725,253 @@ def FixGrades():
         UpdateStudent(student)
 
 
+# - - - - - - - - - - - - - - - - - - - -  REPORT CARDS  - - - - - - - - - - - - - - - - - - - - - - - #
+
+
+def renderReportCard(fullname, sn, total_points, grades, fmt):
+    """
+    renderReportCard: builds the report card for a single student from the same data printStudentGrade prints
+    :param fullname: student's full name
+    :param sn: student's student number
+    :param total_points: student's total accumulated points
+    :param grades: list of (assignment name, points possible, points earned)
+    :param fmt: "txt" or "html"
+    :return: string, contents of the report card
+    """
+    total_points_possible = sum(int(grade[1]) for grade in grades)
+    if total_points_possible > 0:
+        summary = "{} has a total of {} points out of {} possible: {:.2f}%".format(
+            fullname, total_points, total_points_possible, (total_points / total_points_possible) * 100)
+    else:
+        summary = "{} has not completed any assignments".format(fullname)
+    if fmt == "html":
+        rows = "".join("<tr><td>{}</td><td>{}</td><td>{}</td></tr>\n".format(
+            html.escape(str(grade[0])), grade[1], grade[2]) for grade in grades)
+        return "<html>\n<head><title>{0} Report Card: {1}</title></head>\n<body>\n" \
+               "<h1>{0} Grades for {1} ({2})</h1>\n<table>\n" \
+               "<tr><th>Assignment</th><th>Points Possible</th><th>Points Awarded</th></tr>\n" \
+               "{3}</table>\n<p>{4}</p>\n</body>\n</html>\n".format(
+                html.escape(COURSE_NAME), html.escape(fullname), html.escape(sn), rows, html.escape(summary))
+    lines = ["{} Grades for {} ({})".format(COURSE_NAME, fullname, sn),
+             "{:20}\t{:10}\t{:10}".format("Assignment", "Points Possible", "Points Awarded")]
+    for grade in grades:
+        lines.append("{:20}\t{:10}\t{:10}".format(grade[0], grade[1], grade[2]))
+    lines.append(summary)
+    return "\n".join(lines) + "\n"
+
+
+def writeReportCard(job):
+    """
+    writeReportCard: renders one student's report card and writes it to disk.  The card is written to a temporary file
+    in the output directory first and then renamed over the final name, so a reader never sees a half written card.
+    Runs inside the report card process pool, so it must not rely on the course global
+    :param job: tuple (student number, full name, total points, grades, format, output directory)
+    :return: tuple (student number, error message or None if the report card was written)
+    """
+    sn, fullname, total_points, grades, fmt, out_dir = job
+    contents = renderReportCard(fullname, sn, total_points, grades, fmt)
+    name = "".join(c if c.isalnum() or c in "@-_" else "_" for c in "{}_{}".format(sn, fullname))
+    path = os.path.join(out_dir, "{}.{}".format(name, fmt))
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp_path, "w") as tmp:
+            tmp.write(contents)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return sn, str(err)
+    return sn, None
+
+
+def GenerateReportCards(out_dir=None, fmt=None, workers=None):
+    """
+    GenerateReportCards: writes a report card file for every student in the course.  Student data is fetched with one
+    query and the rendering is sharded by student across a process pool, printing progress and throughput as it goes.
+    A card that cannot be written is reported at the end without stopping the rest of the batch
+    :param out_dir: directory report cards are written to, None uses REPORT_CARD_DIR
+    :param fmt: "txt" or "html", None uses REPORT_CARD_FORMAT
+    :param workers: number of processes, None uses REPORT_CARD_WORKERS or every core
+    :return: int, number of report cards written
+    """
+    out_dir = out_dir or REPORT_CARD_DIR
+    fmt = fmt or REPORT_CARD_FORMAT
+    if fmt not in ("txt", "html"):
+        print(WARNING + "Unknown report card format: {}".format(fmt) + NORMAL)
+        return 0
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    jobs = [(sn, fullname, total_points, grades, fmt, out_dir)
+            for sn, fullname, total_points, grades in getAllStudentGrades()]
+    if not jobs:
+        print(WARNING + "No students to generate report cards for" + NORMAL)
+        return 0
+    workers = workers or REPORT_CARD_WORKERS or os.cpu_count() or 1
+    # hand each process a few chunks of students so the pool stays busy without paying per-student overhead
+    chunksize = max(1, len(jobs) // (workers * 4))
+    done = written = 0
+    failed = []
+    with multiprocessing.Pool(workers) as pool:
+        for sn, error in pool.imap_unordered(writeReportCard, jobs, chunksize):
+            done += 1
+            if error is None:
+                written += 1
+            else:
+                failed.append((sn, error))
+            if done % chunksize == 0 or done == len(jobs):
+                elapsed = time.perf_counter() - start
+                print("\rGenerated {}/{} report cards ({:.0f}/s)".format(
+                    done, len(jobs), done / elapsed if elapsed else 0), end="")
+    print()
+    for sn, error in failed:
+        print(WARNING + "Report card for {} not written: {}".format(sn, error) + NORMAL)
+    elapsed = time.perf_counter() - start
+    print(OK + "{} report cards written to {} in {:.2f}s using {} processes".format(
+        written, out_dir, elapsed, workers) + NORMAL)
+    return written
+
+
+# - - - - - - - - - - - - - - - - - - - -  BACKUP AND RESTORE  - - - - - - - - - - - - - - - - - - - - - - - #
+
+
+def copyDatabase(source, destination, pages=None):
+    """
+    copyDatabase: copies one sqlite database into another using the SQLite online backup API.  The copy is made
+    a few pages at a time, so other connections are only held up for one step and never for the whole copy
+    :param source: open sqlite3 connection to copy from
+    :param destination: open sqlite3 connection to copy into
+    :param pages: number of pages copied per step, None uses BACKUP_PAGES, -1 copies everything in one step
+    :return: int, number of pages copied
+    """
+    if pages is None:
+        pages = BACKUP_PAGES
+    copied = [0]
+
+    def progress(status, remaining, total):
+        copied[0] = total - remaining
+
+    source.backup(destination, pages=pages, progress=progress)
+    return copied[0]
+
+
+def listBackups(backup_dir=None):
+    """
+    listBackups: finds the snapshots in the backup directory
+    :param backup_dir: directory snapshots are kept in, None uses BACKUP_DIR
+    :return: list of snapshot paths, oldest first
+    """
+    backup_dir = backup_dir or BACKUP_DIR
+    if not os.path.isdir(backup_dir):
+        return []
+    prefix = os.path.splitext(os.path.basename(DATABASE_NAME))[0] + "-"
+    return sorted(os.path.join(backup_dir, name) for name in os.listdir(backup_dir)
+                  if name.startswith(prefix) and name.endswith(".db"))
+
+
+def BackupDatabase(backup_dir=None, keep=None, pages=None):
+    """
+    BackupDatabase: takes a consistent timestamped snapshot of the database while it is in use.  The snapshot is
+    written to a temporary file and renamed into place once complete, then the oldest snapshots beyond keep are removed
+    :param backup_dir: directory snapshots are written to, None uses BACKUP_DIR
+    :param keep: number of snapshots to keep, None uses BACKUP_KEEP
+    :param pages: number of pages copied per step, None uses BACKUP_PAGES
+    :return: string, path of the new snapshot, None if the backup failed
+    """
+    backup_dir = backup_dir or BACKUP_DIR
+    keep = BACKUP_KEEP if keep is None else keep
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    name = "{}-{}.db".format(os.path.splitext(os.path.basename(DATABASE_NAME))[0], stamp)
+    path = os.path.join(backup_dir, name)
+    tmp_path = path + ".tmp"
+    start = time.perf_counter()
+    # OSError is caught as well as sqlite3.Error so a full disk or a snapshot removed by hand is reported instead of
+    # ending the backup scheduler thread
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        source = getConnection()
+        try:
+            if source is workingSet:
+                # take a private copy of the working set in one in memory step while holding the lock, then write
+                # that copy to disk a few pages at a time without holding up sqlExecute
+                source, working = sqlite3.connect(":memory:"), source
+                with workingSetLock:
+                    copyDatabase(working, source, -1)
+            destination = sqlite3.connect(tmp_path)
+            try:
+                copied = copyDatabase(source, destination, pages)
+            finally:
+                destination.close()
+        finally:
+            closeConnection(source)
+        os.replace(tmp_path, path)
+        for old in listBackups(backup_dir)[:-keep] if keep > 0 else []:
+            os.remove(old)
+    except (sqlite3.Error, OSError) as err:
+        print(WARNING + "Backup Failed: " + str(err) + NORMAL)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    elapsed = time.perf_counter() - start
+    print(OK + "Backed up {} pages to {} in {:.3f}s".format(copied, path, elapsed) + NORMAL)
+    return path
+
+
+def RestoreBackup(path, pages=None):
+    """
+    RestoreBackup: copies a snapshot back over the database using the online backup API, then reloads the course so
+    the students and assignments in memory match the restored database.  In Working Set Mode the snapshot is copied
+    into the working set and written straight back to disk
+    :param path: path of snapshot to restore
+    :param pages: number of pages copied per step, None uses BACKUP_PAGES
+    :return: boolean, True if the snapshot was restored, False if there was an error
+    """
+    if not os.path.isfile(path):
+        print(WARNING + "Snapshot not found: {}".format(path) + NORMAL)
+        return False
+    start = time.perf_counter()
+    source = sqlite3.connect(path)
+    try:
+        destination = getConnection()
+        try:
+            with lockWorkingSet():
+                copied = copyDatabase(source, destination, pages)
+        finally:
+            closeConnection(destination)
+    except sqlite3.Error as err:
+        print(WARNING + "Restore Failed: " + str(err) + NORMAL)
+        return False
+    finally:
+        source.close()
+    saved = workingSet is None or SaveWorkingSet()
+    elapsed = time.perf_counter() - start
+    course.students.clear()
+    course.assignments.clear()
+    preprocessing()
+    if not saved:
+        print(WARNING + "Restored {} pages from {} into memory but could not write them to {}".format(
+            copied, path, DATABASE_NAME) + NORMAL)
+        return False
+    print(OK + "Restored {} pages from {} in {:.3f}s".format(copied, path, elapsed) + NORMAL)
+    return True
+
+
+def StartBackupScheduler(interval=None):
+    """
+    StartBackupScheduler: starts a background thread that calls BackupDatabase every interval seconds
+    :param interval: seconds between backups, None uses BACKUP_INTERVAL
+    :return: threading.Event, set it to stop the scheduler
+    """
+    interval = interval or BACKUP_INTERVAL
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            BackupDatabase()
+
+    threading.Thread(target=run, name="BackupScheduler", daemon=True).start()
+    return stop
+
+
 # - - - - - - - - - - - - - - - - - - - -  MENU OPTIONS  - - - - - - - - - - - - - - - - - - - - - - - #
 def preprocessing():
     """
@@ -399,6 +987,13 @@ def preprocessing():
     for record in records:
         new_assignment = Assignment(record[0], record[1], record[2])
         course.assignments.append(new_assignment)
+    course.ranking = Ranking()
+    course.assignmentRankings = {}
+    for sn, fullname, total_points, grades in getAllStudentGrades():
+        if grades:
+            course.ranking.Update(sn, total_points)
+        for grade in grades:
+            course.assignmentRankings.setdefault(grade[0], Ranking()).Update(sn, grade[2])
 
 
 def printMenu():
@@ -406,7 +1001,7 @@ def printMenu():
     printMenu Function:  Prints the main menu, If adding options, be sure to add option to the MenuOptions list.
     :return: MenuOptions to help with validating user input
     """
-    menuOptions = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    menuOptions = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 0]
     print("* MAIN MENU *")
     print("=============")
     print("1: View Roster")
@@ -419,6 +1014,11 @@ def printMenu():
     print("-------------------")
     print("7: Delete Student")
     print("8: Delete Assignment")
+    print("-------------------")
+    print("9: Generate Report Cards")
+    print("10: Backup/Restore Database")
+    print("11: Save Changes to Disk")
+    print("12: View Class Rankings")
     print("0: Quit")
     return menuOptions
 
@@ -651,6 +1251,65 @@ def compareDates(due_date, dateTurnedIn):
     return delta.days
 
 
+def printRanking(ranking, students):
+    """
+    printRanking Function:  prints the rank, percentile and score of each student in a list of student numbers
+    :param ranking: Ranking the students were taken from
+    :param students: list of student numbers
+    """
+    names = {student.student_number: student.fullname for student in course.students}
+    print("{:4s}: {:20s}\t{:14s}\t{:10s}\t{}".format("Rank", "Name", "Student Number", "Percentile", "Points"))
+    for sn in students:
+        print("{:4s}: {:20s}\t{:14s}\t{:10.1f}\t{}".format(str(ranking.Rank(sn)), names.get(sn, ""), sn,
+                                                            ranking.Percentile(sn), ranking.scores[sn]))
+
+
+def RankingMenu():
+    """
+    RankingMenu: Allows the user to rank the class by total points or by a single assignment, then look up one
+    student's rank, the top students or the students between two percentiles.  Only students with a graded assignment
+    are ranked
+    :return: returns nothing, used if the user input is invalid
+    """
+    amOptions = printAssignmentMenu()
+    rkSelection = input("Enter line number of Assignment to rank by or 'A' for total points: ")
+    if rkSelection.isnumeric() and int(rkSelection) in amOptions:
+        name = course.assignments[int(rkSelection)].name
+        ranking = course.assignmentRankings.get(name, Ranking())
+        print("Rankings for {}{}{}".format(OK, name, NORMAL))
+    elif rkSelection == 'A':
+        ranking = course.ranking
+    else:
+        print(WARNING + "Invalid Input" + NORMAL)
+        return
+    if ranking.size == 0:
+        print("No students have been graded")
+        return
+    query = input("(r)Rank of Student, (t)Top Students or (p)Percentile Range? (r/t/p): ")
+    if query.lower() == 'r':
+        smOptions = printStudentMenu()
+        stSelection = input("Enter line number: ")
+        if stSelection.isnumeric() and int(stSelection) in smOptions:
+            student = course.students[int(stSelection)]
+            if student.student_number in ranking.scores:
+                printRanking(ranking, [student.student_number])
+            else:
+                print("{} has not been graded".format(student.fullname))
+            return
+    elif query.lower() == 't':
+        k = input("Number of students: ")
+        if k.isnumeric():
+            printRanking(ranking, ranking.TopK(int(k)))
+            return
+    elif query.lower() == 'p':
+        low = input("Lowest percentile (0-100): ")
+        high = input("Highest percentile (0-100): ")
+        if low.isnumeric() and high.isnumeric() and int(low) <= int(high):
+            printRanking(ranking, list(reversed(ranking.Between(int(low), int(high)))))
+            return
+    print(WARNING + "Invalid Input" + NORMAL)
+
+
 def DeleteStudentMenu():
     """
     DeleteStudentMenu: Menu for deleting students from the course
@@ -670,6 +1329,32 @@ def DeleteStudentMenu():
             return
 
 
+def BackupMenu():
+    """
+    BackupMenu: Allows the user to take a backup of the database or restore a previous snapshot
+    :return: returns nothing if the user input is invalid
+    """
+    confirm = input("(b)Backup or (r)Restore database? (b/r): ")
+    if confirm.lower() == 'b':
+        BackupDatabase()
+    elif confirm.lower() == 'r':
+        backups = listBackups()
+        if not backups:
+            print(WARNING + "No snapshots found in {}".format(BACKUP_DIR) + NORMAL)
+            return
+        for i in range(len(backups)):
+            print("{:2s}: {}".format(str(i), os.path.basename(backups[i])))
+        bkSelection = input("Enter line number of snapshot to restore: ")
+        if bkSelection.isnumeric() and int(bkSelection) < len(backups):
+            path = backups[int(bkSelection)]
+            confirm = input("Really overwrite {} with {}{}{}? (y/n): ".format(
+                DATABASE_NAME, OK, os.path.basename(path), NORMAL))
+            if confirm.lower() == 'y':
+                RestoreBackup(path)
+        else:
+            print(WARNING + "Invalid Input" + NORMAL)
+
+
 def DeleteAssignmentMenu():
     """
     DeleteAssignmentMenu: Allows the user to select an assignment to delete or update
@@ -695,7 +1380,11 @@ def DeleteAssignmentMenu():
 if __name__ == '__main__':
     # Main Loop
     course = Course(COURSE_NAME)
+    if WORKING_SET:
+        LoadWorkingSet()
     preprocessing()
+    if BACKUP_INTERVAL:
+        StartBackupScheduler()
 
     while True:
         print()
@@ -707,6 +1396,10 @@ if __name__ == '__main__':
         else:
             print(WARNING + "Invalid Input" + NORMAL)
             continue
+        # QUIT
+        if selection == 0:
+            SaveWorkingSet()
+            break
         # VIEW ROSTER
         if selection == 1:
             printStudentMenu()
@@ -731,3 +1424,18 @@ if __name__ == '__main__':
         # DELETE ASSIGNMENT
         if selection == 8:
             DeleteAssignmentMenu()
+        # GENERATE REPORT CARDS
+        if selection == 9:
+            GenerateReportCards()
+        # BACKUP/RESTORE DATABASE
+        if selection == 10:
+            BackupMenu()
+        # SAVE CHANGES TO DISK
+        if selection == 11:
+            if SaveWorkingSet():
+                print(OK + "Changes Saved to {}".format(DATABASE_NAME) + NORMAL)
+            else:
+                print("Not in Working Set Mode, changes are already saved to {}".format(DATABASE_NAME))
+        # VIEW CLASS RANKINGS
+        if selection == 12:
+            RankingMenu()